@@ -49,8 +49,8 @@ C7N uses CEL and the :py:mod:`c7nlib` module as follows::
         def process(self,
             resources: Iterable[celpy.celtypes.MapType]) -> Iterator[celpy.celtypes.MapType]:
             now = datetime.datetime.utcnow()
-            for resource in resources:
-                with C7NContext(filter=the_filter):
+            with C7NContext(filter=the_filter):
+                for resource in resources:
                     cel_activation = {
                         "resource": celpy.json_to_cel(resource),
                         "now": celpy.celtypes.TimestampType(now),
@@ -60,6 +60,15 @@ C7N uses CEL and the :py:mod:`c7nlib` module as follows::
 
 This isn't the whole story, this is the starting point.
 
+When many ``CELFilter`` instances are built for the same expression, the :func:`compile_and_bind`
+function can replace the ``Environment``, ``compile()``, and ``program()`` steps of ``validate()``.
+It caches the resulting program, so each distinct expression is parsed once::
+
+    self.pgm = celpy.c7nlib.compile_and_bind(
+        self.expr,
+        frozenset(self.decls.items()),
+        frozenset(celpy.c7nlib.FUNCTIONS.items()))
+
 This library of functions is bound into the program that's built from the AST.
 
 Several objects are required in activation for use by the CEL expression
@@ -78,10 +87,10 @@ The core value features of C7N require a number of CEL extensions.
 
 -   :func:`glob(string, pattern)` uses Python fnmatch rules. This implements ``op: glob``.
 
--   :func:`difference(list, list)` creates intermediate sets and computes the difference
+-   :func:`difference(list, list)` creates an intermediate set and computes the difference
     as a boolean value. Any difference is True.  This implements ``op: difference``.
 
--   :func:`intersect(list, list)` creats intermediate sets and computes the intersection
+-   :func:`intersect(list, list)` creates an intermediate set and computes the intersection
     as a boolean value. Any interection is True.  This implements ``op: intersect``.
 
 -   :func:`normalize(string)` supports normalized comparison between strings.
@@ -89,11 +98,15 @@ The core value features of C7N require a number of CEL extensions.
 
 -   :func:`net.cidr_contains` checks to see if a given CIDR block contains a specific
     address.  See https://www.openpolicyagent.org/docs/latest/policy-reference/#net.
+    The :func:`cidr_contains_int(cidr, ip)` function provides this for IPv4 addresses.
 
 -   :func:`net.cidr_size` extracts the prefix length of a parsed CIDR block.
 
 -   :func:`version` uses ``disutils.version.LooseVersion`` to compare version strings.
 
+-   :func:`unique_size_estimate` is an opt-in variant of :func:`unique_size` for very large lists.
+    When :py:mod:`datasketch` is installed, it returns an approximate count.
+
 -   :func:`resource_count` function. This is TBD.
 
 The type: value_from features
@@ -180,6 +193,7 @@ and the function is also part of ``CELFilter``.
 
     class ImagesUnusedMixin:
         # from :py:class:`c7n.resources.ami.ImageUnusedFilter`
+        # With ``C7NContext(filter, concurrent_pulls=True)`` these two run in separate threads.
         def _pull_ec2_images(self, resource):
             pass
         def _pull_asg_images(self, resource):
@@ -187,6 +201,7 @@ and the function is also part of ``CELFilter``.
 
     class SnapshotUnusedMixin:
         # from :py:class:`c7n.resources.ebs.SnapshotUnusedFilter`
+        # With ``C7NContext(filter, concurrent_pulls=True)`` these two run in separate threads.
         def _pull_asg_snapshots(self, resource):
             pass
         def _pull_ami_snapshots(self, resource):
@@ -257,8 +272,20 @@ The ``C7N`` context object contains the following attributes:
     resource manager. It can be used to manage supplemental
     queries using C7N caches and other resource management.
 
+-   ``concurrent_pulls``. If true, :func:`all_images` and :func:`all_snapshots` run their
+    two ``CELFilter`` pulls in separate threads. The default is false: the pulls run one
+    after the other. Only set this when the filter's ``_pull_*`` methods -- including the
+    C7N session factory and resource caches they use -- are safe to call from two
+    threads at once.
+
 This is set by the :py:class:`C7NContext` prior to CEL evaluation.
 
+The context also holds caches for values that don't change while a filter
+is applied to a collection of resources; for example, the documents read by :func:`value_from`,
+and the results of functions like :func:`all_images` that depend only on the filter.
+These caches last as long as the ``with C7NContext(...)`` block, which is why the
+example above wraps the whole loop over resources, not each individual evaluation.
+
 Name Resolution
 ===============
 
@@ -272,28 +299,59 @@ The :func:`value_from` function relies on :func:`text_from` and :func:`parse_tex
 Changing either of these functions with an override won't modify the behavior
 of :func:`value_from`.
 """
+import concurrent.futures
 import csv
+import datetime
 import fnmatch
+import functools
 import io
 import ipaddress
 import json
 import logging
-import os.path
+import os
+import re
 import sys
+import urllib.error
+import urllib.parse
 import urllib.request
-import zlib
+from collections.abc import Hashable
 from contextlib import closing
 from distutils import version as version_lib
-from types import TracebackType
-from typing import (Any, Callable, Dict, Iterator, List, Optional, Type, Union,
-                    cast)
+from types import MappingProxyType, TracebackType
+from typing import (Any, Callable, Dict, FrozenSet, List,
+                    Mapping, Optional, Pattern, Tuple, Type, Union, cast)
 
 import dateutil
 import jmespath  # type: ignore [import]
+import urllib3
 
-from celpy import InterpretedRunner, celtypes
+from celpy import (Environment, Expression, InterpretedRunner, Runner,
+                   celtypes)
 from celpy.adapter import json_to_cel
-from celpy.evaluation import Annotation, Context, Evaluator
+from celpy.evaluation import (Activation, Annotation, CELFunction, Context,
+                              Evaluator)
+
+# Optional. A HyperLogLog sketch estimates the unique size of very large lists in constant memory.
+try:
+    from datasketch import HyperLogLog  # type: ignore [import]
+except ImportError:  # pragma: no cover
+    HyperLogLog = None
+
+# Optional. orjson parses JSON several times faster than the json module.
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+# Optional. botocore's adaptive retry mode backs off when AWS throttles requests.
+try:
+    from botocore.config import Config as BotocoreConfig  # type: ignore [import]
+    _CLIENT_CONFIG = BotocoreConfig(retries={"max_attempts": 10, "mode": "adaptive"})
+except ImportError:  # pragma: no cover
+    _CLIENT_CONFIG = None
+
+# Connections are pooled, so reading several URL's from one host can reuse a connection.
+_HTTP = urllib3.PoolManager(maxsize=16, headers={"Accept-Encoding": "gzip"})
 
 logger = logging.getLogger(__name__)
 
@@ -310,14 +368,50 @@ class C7NContext:
             cel_prgm.evaluate(cel_activation)
     """
 
-    def __init__(self, filter: Any) -> None:
+    def __init__(self, filter: Any, concurrent_pulls: bool = False) -> None:
         self.filter = filter
+        self.concurrent_pulls = concurrent_pulls
+        self._previous = cast("C7NContext", None)
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        Create empty caches. These last for the life of this context;
+        if the context is entered again, it starts with empty caches.
+        """
+        self._text_cache: Dict[str, celtypes.StringType] = {}
+        self._value_from_cache: Dict[Tuple[str, str], celtypes.Value] = {}
+        self._flow_logs_map: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._related_cache: Dict[str, Dict[Any, celtypes.Value]] = {}
+        self._clients: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._call_cache: Dict[str, celtypes.Value] = {}
+        self._snapshot_attributes: Dict[str, celtypes.Value] = {}
+        self._schedule_cache: Dict[Any, celtypes.Value] = {}
 
     def __repr__(self) -> str:  # pragma: no cover
         return f"{self.__class__.__name__}(filter={self.filter!r})"
 
+    def client(self, service: str, region: Optional[str] = None) -> Any:
+        """
+        Returns a boto3 client for the given service and region.
+        Creating a client is expensive, so each one is built once per context.
+
+        When :py:mod:`botocore` is available, clients use adaptive retries,
+        which back off when AWS throttles requests.
+        """
+        if (service, region) not in self._clients:
+            session = self.filter.manager.session_factory()
+            options: Dict[str, Any] = {}
+            if region is not None:
+                options["region_name"] = region
+            if _CLIENT_CONFIG is not None:
+                options["config"] = _CLIENT_CONFIG
+            self._clients[(service, region)] = session.client(service, **options)
+        return self._clients[(service, region)]
+
     def __enter__(self) -> None:
         global C7N
+        self._previous = C7N
         C7N = self
 
     def __exit__(
@@ -327,7 +421,8 @@ class C7NContext:
         traceback: Optional[TracebackType],
     ) -> None:
         global C7N
-        C7N = cast("C7NContext", None)
+        C7N = self._previous
+        self._reset()
         return
 
 
@@ -337,6 +432,37 @@ class C7NContext:
 C7N = cast("C7NContext", None)
 
 
+def _cache_on_context(
+    function: Callable[..., celtypes.Value]
+) -> Callable[..., celtypes.Value]:
+    """
+    Decorates a function whose result depends only on the C7N filter, not on its arguments.
+    The result is computed once per :py:class:`C7NContext` and reused for every resource.
+    """
+    @functools.wraps(function)
+    def cached(*args: Any) -> celtypes.Value:
+        if C7N is None:
+            return function(*args)
+        key = function.__name__
+        if key not in C7N._call_cache:
+            C7N._call_cache[key] = function(*args)
+        return C7N._call_cache[key]
+    return cached
+
+
+# Keys of the ``{"Key": x, "Value": y}`` items searched by :func:`key`.
+_KEY = celtypes.StringType("Key")
+_VALUE = celtypes.StringType("Value")
+
+# Resource keys used by the functions below.
+_K_TARGET_KEY_ID = celtypes.StringType("TargetKeyId")
+_K_KEY_ID = celtypes.StringType("KeyId")
+_K_LOG_GROUP_NAME = celtypes.StringType("logGroupName")
+_K_SNAPSHOT_ID = celtypes.StringType("SnapshotId")
+_K_LB_NAME = celtypes.StringType("LoadBalancerName")
+_K_LB_ARN = celtypes.StringType("LoadBalancerArn")
+
+
 def key(source: celtypes.ListType, target: celtypes.StringType) -> celtypes.Value:
     """
     The C7N shorthand ``tag:Name`` doesn't translate well to CEL. It extracts a single value
@@ -361,18 +487,19 @@ def key(source: celtypes.ListType, target: celtypes.StringType) -> celtypes.Valu
     ``resource["Tags"].first(x, x["Key"] == "Name" ? x["Value"] : null, null)``
     This macro returns the first non-null value or the default (which can be ``null``.)
     """
-    key = celtypes.StringType("Key")
-    value = celtypes.StringType("Value")
-    matches: Iterator[celtypes.Value] = (
-        item
-        for item in source
-        if cast(celtypes.StringType, cast(celtypes.MapType, item).get(key))
-        == target  # noqa: W503
-    )
-    try:
-        return cast(celtypes.MapType, next(matches)).get(value)
-    except StopIteration:
-        return None
+    for item in source:
+        mapping = cast(celtypes.MapType, item)
+        if mapping.get(_KEY) == target:
+            return mapping.get(_VALUE)
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _glob_re(pattern: str) -> Pattern[str]:
+    """
+    Compile a glob pattern once; the same pattern is generally matched against many resources.
+    """
+    return re.compile(fnmatch.translate(pattern))
 
 
 def glob(text: celtypes.StringType, pattern: celtypes.StringType) -> celtypes.BoolType:
@@ -386,7 +513,7 @@ def glob(text: celtypes.StringType, pattern: celtypes.StringType) -> celtypes.Bo
 
     We also support ``glob(some_string, "*.py")``.
     """
-    return celtypes.BoolType(fnmatch.fnmatch(text, pattern))
+    return celtypes.BoolType(_glob_re(str(pattern)).match(str(text)) is not None)
 
 
 def difference(left: celtypes.ListType, right: celtypes.ListType) -> celtypes.BoolType:
@@ -394,8 +521,11 @@ def difference(left: celtypes.ListType, right: celtypes.ListType) -> celtypes.Bo
     Compute the difference between two lists. This is ordered set difference: left - right.
     It's true if the result is non-empty: there is an item in the left, not present in the right.
     It's false if the result is empty: the lists are the same.
+
+    Only the right side is built into a set; this stops at the first item not in it.
     """
-    return celtypes.BoolType(bool(set(left) - set(right)))
+    right_set = set(right)
+    return celtypes.BoolType(any(item not in right_set for item in left))
 
 
 def intersect(left: celtypes.ListType, right: celtypes.ListType) -> celtypes.BoolType:
@@ -403,8 +533,12 @@ def intersect(left: celtypes.ListType, right: celtypes.ListType) -> celtypes.Boo
     Compute the intersection between two lists.
     It's true if the result is non-empty: there is an item in both lists.
     It's false if the result is empty: there is no common item between the lists.
+
+    Only the smaller list is built into a set; this stops at the first common item.
     """
-    return celtypes.BoolType(bool(set(left) & set(right)))
+    small, big = (left, right) if len(left) <= len(right) else (right, left)
+    small_set = set(small)
+    return celtypes.BoolType(any(item in small_set for item in big))
 
 
 def normalize(string: celtypes.StringType) -> celtypes.StringType:
@@ -421,12 +555,46 @@ def unique_size(collection: celtypes.ListType) -> celtypes.IntType:
     return celtypes.IntType(len(set(collection)))
 
 
+# Lists at least this long are sized with a HyperLogLog sketch, if datasketch is available.
+_UNIQUE_SIZE_ESTIMATE_THRESHOLD = 100_000
+
+
+def unique_size_estimate(collection: celtypes.ListType) -> celtypes.IntType:
+    """
+    Estimated unique size of a list.
+
+    For very large lists, when :py:mod:`datasketch` is installed, this is an estimate
+    from a HyperLogLog sketch, typically within 2% of the exact size.
+    This avoids building a set with an entry for every distinct item.
+    Otherwise, it's the exact :func:`unique_size`.
+
+    Items are hashed by their ``repr()``, so ``1`` and ``"1"`` are distinct, as they are in a set.
+    """
+    if HyperLogLog is None or len(collection) < _UNIQUE_SIZE_ESTIMATE_THRESHOLD:
+        return unique_size(collection)
+    sketch = HyperLogLog(p=12)
+    for item in collection:
+        sketch.update(repr(item).encode("utf-8"))
+    return celtypes.IntType(int(sketch.count()))
+
+
 class IPv4Network(ipaddress.IPv4Network):
+    """
+    An IPv4 network that also keeps its range as a pair of integers.
+    Checking an address is two integer comparisons.
+    """
+
+    def __init__(self, address, strict=True):  # type: ignore[no-untyped-def]
+        super().__init__(address, strict)
+        self._low = int(self.network_address)
+        self._high = int(self.broadcast_address)
 
     # Override for net 2 net containment comparison
     def __contains__(self, other):  # type: ignore[no-untyped-def]
         if other is None:
             return False
+        if isinstance(other, (int, ipaddress.IPv4Address)):
+            return self._low <= int(other) <= self._high
         if isinstance(other, ipaddress._BaseNetwork):
             return self.supernet_of(other)  # type: ignore[no-untyped-call]
         return super(IPv4Network, self).__contains__(other)
@@ -457,6 +625,28 @@ CIDR = Union[None, IPv4Network, ipaddress.IPv4Address]
 CIDR_Class = Union[Type[IPv4Network], Callable[..., ipaddress.IPv4Address]]
 
 
+def _parse_cidr(value):  # type: ignore[no-untyped-def]
+    """Parse a CIDR range or an address."""
+    klass: CIDR_Class = IPv4Network
+    if "/" not in value:
+        klass = ipaddress.ip_address
+    v: CIDR
+    try:
+        v = klass(value)
+    except (ipaddress.AddressValueError, ValueError):
+        v = None
+    return v
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_cidr_cached(value):  # type: ignore[no-untyped-def]
+    """
+    Parse a CIDR range or an address.
+    Most expressions compare against a few literal ranges, so results are cached.
+    """
+    return _parse_cidr(value)  # type: ignore[no-untyped-call]
+
+
 def parse_cidr(value):  # type: ignore[no-untyped-def]
     """
     Process cidr ranges.
@@ -464,16 +654,32 @@ def parse_cidr(value):  # type: ignore[no-untyped-def]
     This is a union of types outside CEL.
 
     It appears to be Union[None, IPv4Network, ipaddress.IPv4Address]
+
+    Unhashable values, like lists and mappings, are parsed without the cache.
     """
-    klass: CIDR_Class = IPv4Network
-    if "/" not in value:
-        klass = ipaddress.ip_address
-    v: CIDR
+    if not isinstance(value, Hashable):
+        return _parse_cidr(value)  # type: ignore[no-untyped-call]
+    return _parse_cidr_cached(value)  # type: ignore[no-untyped-call]
+
+
+def cidr_contains_int(
+    cidr: celtypes.StringType, ip: celtypes.StringType
+) -> celtypes.BoolType:
+    """
+    Check to see if a CIDR block contains a specific IPv4 address.
+    The block is parsed once and the address is converted to an integer,
+    so the test is two integer comparisons.
+
+    Unparseable blocks or addresses are not contained.
+    """
+    network = parse_cidr(cidr)  # type: ignore[no-untyped-call]
+    if not isinstance(network, IPv4Network):
+        return celtypes.BoolType(False)
     try:
-        v = klass(value)
+        address = int(ipaddress.IPv4Address(ip))
     except (ipaddress.AddressValueError, ValueError):
-        v = None
-    return v
+        return celtypes.BoolType(False)
+    return celtypes.BoolType(network._low <= address <= network._high)
 
 
 def size_parse_cidr(value: celtypes.StringType,) -> Optional[celtypes.IntType]:
@@ -498,10 +704,18 @@ class ComparableVersion(version_lib.LooseVersion):
             return False
 
 
+@functools.lru_cache(maxsize=1024)
+def _version(value: str) -> ComparableVersion:
+    """
+    Parse a version string once; literal versions are compared against many resources.
+    """
+    return ComparableVersion(value)
+
+
 def version(
     value: celtypes.StringType,
 ) -> celtypes.Value:  # actually, a ComparableVersion
-    return cast(celtypes.Value, ComparableVersion(value))
+    return cast(celtypes.Value, _version(str(value)))
 
 
 def present(value: celtypes.StringType,) -> celtypes.Value:
@@ -512,20 +726,78 @@ def absent(value: celtypes.StringType,) -> celtypes.Value:
     return cast(celtypes.Value, not bool(value))
 
 
+@functools.lru_cache(maxsize=None)
+def _proxy_manager(proxy_url: str) -> urllib3.ProxyManager:
+    """A connection pool for a proxy server, built once per proxy."""
+    return urllib3.ProxyManager(proxy_url, maxsize=16, headers={"Accept-Encoding": "gzip"})
+
+
+def _pool_for(parts: urllib.parse.SplitResult) -> urllib3.PoolManager:
+    """
+    The connection pool for a URL. Like :py:func:`urllib.request.urlopen`, this honors
+    the ``HTTP_PROXY``, ``HTTPS_PROXY``, and ``NO_PROXY`` settings.
+    """
+    proxy = urllib.request.getproxies().get(parts.scheme)
+    if proxy and not urllib.request.proxy_bypass(parts.netloc):
+        return _proxy_manager(proxy)
+    return _HTTP
+
+
 def text_from(url: celtypes.StringType,) -> celtypes.Value:
     """
     Read raw text from a URL. This can be expanded to accept S3 or other URL's.
+
+    HTTP and HTTPS connections come from a shared pool, so several URL's on one host
+    reuse a connection. Proxy environment variables are honored, as they are by ``urlopen()``.
+    An error status raises :py:exc:`urllib.error.HTTPError`.
+    Other schemes, like ``file:``, are read with :py:func:`urllib.request.urlopen`.
+
+    Within a :py:class:`C7NContext`, the text is read once and reused.
     """
-    req = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+    if C7N is not None and url in C7N._text_cache:
+        return C7N._text_cache[url]
     raw_data: str
-    with closing(urllib.request.urlopen(req)) as response:
-        if response.info().get("Content-Encoding") == "gzip":
-            raw_data = zlib.decompress(response.read(), zlib.MAX_WBITS | 32).decode(
-                "utf8"
-            )
-        else:
+    parts = urllib.parse.urlsplit(str(url))
+    if parts.scheme in ("http", "https"):
+        response = _pool_for(parts).request("GET", str(url), preload_content=False)
+        try:
+            if response.status >= 400:
+                raise urllib.error.HTTPError(
+                    str(url), response.status, response.reason or "",
+                    cast(Any, response.headers), None)
+            # urllib3 decompresses a gzip response as it's read.
             raw_data = response.read().decode("utf-8")
-    return celtypes.StringType(raw_data)
+        finally:
+            response.release_conn()
+    else:
+        with closing(urllib.request.urlopen(str(url))) as response:
+            raw_data = response.read().decode("utf-8")
+    text = celtypes.StringType(raw_data)
+    if C7N is not None:
+        C7N._text_cache[url] = text
+    return text
+
+
+# A run of 20 digits may be an integer too large for orjson, which would make it a float.
+_LONG_NUMBER = re.compile(r"[0-9]{20}")
+
+
+def _loads(text: str) -> Any:
+    """
+    Parse JSON with :py:mod:`orjson`, when it's available, getting the same result
+    as :py:func:`json.loads`.
+
+    orjson rejects ``NaN`` and ``Infinity``, which the json module accepts;
+    those documents are parsed again with the json module.
+    orjson also turns an integer beyond the unsigned 64-bit range into a float;
+    a document with a number that long is parsed by the json module.
+    """
+    if orjson is None or _LONG_NUMBER.search(text):
+        return json.loads(text)
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return json.loads(text)
 
 
 def parse_text(
@@ -533,16 +805,26 @@ def parse_text(
 ) -> celtypes.Value:
     """
     Parse raw text using a given format.
+
+    JSON is parsed with :py:mod:`orjson`, when it's available.
+
+    The line-oriented formats are read in a single pass over the text;
+    blank lines in the JSON-per-line formats are skipped.
     """
     if format == "json":
-        return json_to_cel(json.loads(source_text))
+        # orjson requires an exact str, not a StringType subclass.
+        return json_to_cel(_loads(str(source_text)))
     elif format == "txt":
         return celtypes.ListType(
-            [celtypes.StringType(s.rstrip()) for s in source_text.splitlines()]
+            [celtypes.StringType(s.rstrip()) for s in io.StringIO(source_text, newline=None)]
         )
     elif format in ("ldjson", "ndjson", "jsonl"):
         return celtypes.ListType(
-            [json_to_cel(json.loads(s)) for s in source_text.splitlines()]
+            [
+                json_to_cel(_loads(s))
+                for s in io.StringIO(source_text, newline=None)
+                if s.strip()
+            ]
         )
     elif format == "csv":
         return celtypes.ListType(
@@ -567,6 +849,9 @@ def value_from(
 
     This makes the format optional, and deduces it from the URL's path information.
 
+    Within a :py:class:`C7NContext`, the parsed value for a given URL and format is cached,
+    so the source is read and parsed once, no matter how many resources are examined.
+
     C7N will generally replace this with a function
     that leverages a more sophisticated :class:`c7n.resolver.ValuesFrom`.
     """
@@ -578,6 +863,8 @@ def value_from(
         format = celtypes.StringType(suffix[1:])
     if format not in supported_formats:
         raise ValueError(f"Unsupported format: {format!r}")
+    if C7N is not None and (url, format) in C7N._value_from_cache:
+        return C7N._value_from_cache[(url, format)]
 
     # 2. read raw data
     # Note this is directly bound to text_from() and does not go though the environment
@@ -585,7 +872,18 @@ def value_from(
     raw_data = cast(celtypes.StringType, text_from(url))
 
     # 3. parse physical format (json, ldjson, ndjson, jsonl, txt, csv, csv2dict)
-    return parse_text(raw_data, format)
+    value = parse_text(raw_data, format)
+    if C7N is not None:
+        C7N._value_from_cache[(url, format)] = value
+    return value
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_jmes(path: str) -> Any:
+    """
+    Compile a JMESPath expression once; the same path is generally applied to many resources.
+    """
+    return jmespath.compile(path)
 
 
 def jmes_path(
@@ -594,7 +892,7 @@ def jmes_path(
     """
     Apply JMESPath to an object read from from a URL.
     """
-    expression = jmespath.compile(path_source)
+    expression = _compile_jmes(str(path_source))
     return json_to_cel(expression.search(source_data))
 
 
@@ -605,7 +903,7 @@ def jmes_path_map(
     Apply JMESPath to a each object read from from a URL.
     This is for ndjson, nljson and jsonl files.
     """
-    expression = jmespath.compile(path_source)
+    expression = _compile_jmes(str(path_source))
     return celtypes.ListType(
         [json_to_cel(expression.search(row)) for row in source_data]
     )
@@ -627,10 +925,11 @@ def marked_key(
     value = key(source, target)
     if value is None:
         return None
-    try:
-        msg, tgt = cast(celtypes.StringType, value).rsplit(":", 1)
-        action, action_date_str = tgt.strip().split("@", 1)
-    except ValueError:
+    msg, colon, tgt = cast(celtypes.StringType, value).rpartition(":")
+    if not colon:
+        return None
+    action, at, action_date_str = tgt.strip().partition("@")
+    if not at:
         return None
     return celtypes.MapType(
         {
@@ -641,6 +940,24 @@ def marked_key(
     )
 
 
+# The creation date used when there's no image.
+_EPOCH_SENTINEL = dateutil.parser.isoparse("2000-01-01T01:01:01.000Z")
+_EMPTY_IMAGE = {"CreationDate": _EPOCH_SENTINEL, "Name": ""}
+
+
+def _parse_iso_datetime(text: str) -> datetime.datetime:
+    """
+    Parse an ISO-8601 timestamp. The standard library handles AWS's usual format
+    much faster than :py:mod:`dateutil`; anything it can't handle goes to ``isoparse()``.
+    """
+    try:
+        if text.endswith("Z"):
+            return datetime.datetime.fromisoformat(text[:-1] + "+00:00")
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return cast(datetime.datetime, dateutil.parser.isoparse(text))
+
+
 def image(resource: celtypes.MapType) -> celtypes.Value:
     """
     Reach into C7N to get the image details for this EC2 or ASG resource.
@@ -667,18 +984,32 @@ def image(resource: celtypes.MapType) -> celtypes.Value:
     # populate cache.
     image = C7N.filter.get_instance_image(resource)
 
-    if image:
-        creation_date = image["CreationDate"]
-        image_name = image["Name"]
-    else:
-        creation_date = "2000-01-01T01:01:01.000Z"
-        image_name = ""
+    if not image:
+        return json_to_cel(_EMPTY_IMAGE)
 
     return json_to_cel(
-        {"CreationDate": dateutil.parser.isoparse(creation_date), "Name": image_name}
+        {"CreationDate": _parse_iso_datetime(image["CreationDate"]), "Name": image["Name"]}
     )
 
 
+def _get_raw_metrics(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Make a statistics request with a native Python request; returns the native datapoints.
+    boto3 doesn't need CEL objects, so there's no reason to convert the request or the result.
+    """
+    client = C7N.client("cloudwatch")
+    data = client.get_metric_statistics(
+        Namespace=request["Namespace"],
+        MetricName=request["MetricName"],
+        Statistics=request["Statistics"],
+        StartTime=request["StartTime"],
+        EndTime=request["EndTime"],
+        Period=request["Period"],
+        Dimensions=request["Dimensions"],
+    )["Datapoints"]
+    return cast(List[Dict[str, Any]], data)
+
+
 def get_raw_metrics(request: celtypes.MapType) -> celtypes.Value:
     """
     Reach into C7N and make a statistics request using the current C7N filter object.
@@ -717,18 +1048,7 @@ def get_raw_metrics(request: celtypes.MapType) -> celtypes.Value:
         We want to have the metrics processing in the new :py:class:`CELFilter` instance.
 
     """
-    client = C7N.filter.manager.session_factory().client("cloudwatch")
-    data = client.get_metric_statistics(
-        Namespace=request["Namespace"],
-        MetricName=request["MetricName"],
-        Statistics=request["Statistics"],
-        StartTime=request["StartTime"],
-        EndTime=request["EndTime"],
-        Period=request["Period"],
-        Dimensions=request["Dimensions"],
-    )["Datapoints"]
-
-    return json_to_cel(data)
+    return json_to_cel(_get_raw_metrics(cast(Dict[str, Any], request)))
 
 
 def get_metrics(
@@ -737,8 +1057,9 @@ def get_metrics(
     """
     Reach into C7N and make a statistics request using the current C7N filter.
 
-    This builds a request object that is passed through to AWS via the :func:`get_raw_metrics`
-    function.
+    This builds the same request object as the :func:`get_raw_metrics` function,
+    but keeps the request and the datapoints as native Python objects.
+    Only the final list of statistics is converted to CEL.
 
     The ``request`` parameter is a Mapping with the following keys and values:
 
@@ -761,23 +1082,19 @@ def get_metrics(
     namespace = C7N.filter.manager.resource_type
     # TODO: Varies by resource/policy type. Each policy's model may have different dimensions.
     dimensions = [{"Name": dimension, "Value": resource.get(dimension)}]
-    raw_metrics = get_raw_metrics(cast(celtypes.MapType, json_to_cel(
+    statistic = request["Statistic"]
+    raw_metrics = _get_raw_metrics(
         {
             "Namespace": namespace,
             "MetricName": request["MetricName"],
             "Dimensions": dimensions,
-            "Statistics": [request["Statistic"]],
+            "Statistics": [statistic],
             "StartTime": request["StartTime"],
             "EndTime": request["EndTime"],
             "Period": request["Period"],
         }
-    )))
-    return json_to_cel(
-        [
-            cast(Dict[str, celtypes.Value], item).get(request["Statistic"])
-            for item in cast(List[celtypes.Value], raw_metrics)
-        ]
     )
+    return json_to_cel([item.get(statistic) for item in raw_metrics])
 
 
 def get_raw_health_events(request: celtypes.MapType) -> celtypes.Value:
@@ -795,12 +1112,23 @@ def get_raw_health_events(request: celtypes.MapType) -> celtypes.Value:
             "eventStatusCodes": ['open', 'upcoming'],
         })
     """
-    client = C7N.filter.manager.session_factory().client(
-        'health', region_name='us-east-1')
+    client = C7N.client('health', region='us-east-1')
     data = client.describe_events(filter=request)['events']
     return json_to_cel(data)
 
 
+# Personal Health Dashboard service names for C7N resource types that differ from the model's.
+_PHD_SVC_NAME_MAP = {
+    'app-elb': 'ELASTICLOADBALANCING',
+    'ebs': 'EBS',
+    'efs': 'ELASTICFILESYSTEM',
+    'elb': 'ELASTICLOADBALANCING',
+    'emr': 'ELASTICMAPREDUCE'
+}
+
+_DEFAULT_STATUSES = (celtypes.StringType('open'), celtypes.StringType('upcoming'))
+
+
 def get_health_events(
         resource: celtypes.MapType,
         statuses: Optional[List[celtypes.Value]] = None
@@ -814,16 +1142,9 @@ def get_health_events(
     ..  todo:: Handle optional list of event types.
     """
     if not statuses:
-        statuses = [celtypes.StringType('open'), celtypes.StringType('upcoming')]
-    phd_svc_name_map = {
-        'app-elb': 'ELASTICLOADBALANCING',
-        'ebs': 'EBS',
-        'efs': 'ELASTICFILESYSTEM',
-        'elb': 'ELASTICLOADBALANCING',
-        'emr': 'ELASTICMAPREDUCE'
-    }
+        statuses = list(_DEFAULT_STATUSES)
     m = C7N.filter.manager
-    service = phd_svc_name_map.get(m.data['resource'], m.get_model().service.upper())
+    service = _PHD_SVC_NAME_MAP.get(m.data['resource']) or m.get_model().service.upper()
     raw_events = get_raw_health_events(cast(celtypes.MapType, json_to_cel(
         {
             "services": [service],
@@ -905,6 +1226,21 @@ def get_related_kms_keys(resource: celtypes.MapType,) -> celtypes.Value:
     return json_to_cel(vpc)
 
 
+def _get_related_cached(kind: str, related_id: Any) -> celtypes.Value:
+    """
+    Make a ``get_related()`` request using the current C7N filter, reusing the result
+    for an ID that's already been seen in this :py:class:`C7NContext`.
+
+    Unhashable arguments -- for example, a complete resource document -- are not cached.
+    """
+    if not isinstance(related_id, Hashable):
+        return json_to_cel(C7N.filter.get_related([related_id]))
+    cache = C7N._related_cache.setdefault(kind, {})
+    if related_id not in cache:
+        cache[related_id] = json_to_cel(C7N.filter.get_related([related_id]))
+    return cache[related_id]
+
+
 def security_group(security_group_id: celtypes.MapType,) -> celtypes.Value:
     """
     Reach into C7N and make a get_related() request using the current C7N filter to get
@@ -918,8 +1254,7 @@ def security_group(security_group_id: celtypes.MapType,) -> celtypes.Value:
     """
 
     # Assuming the :py:class:`CELFilter` class has this method extracted from the legacy filter.
-    security_groups = C7N.filter.get_related([security_group_id])
-    return json_to_cel(security_groups)
+    return _get_related_cached("security_group", security_group_id)
 
 
 def subnet(subnet_id: celtypes.Value,) -> celtypes.Value:
@@ -934,8 +1269,7 @@ def subnet(subnet_id: celtypes.Value,) -> celtypes.Value:
         See :py:class:`VpcSubnetFilter` subclass of :py:class:`RelatedResourceFilter`.
     """
     # Get related ID's first, then get items for the related ID's.
-    subnets = C7N.filter.get_related([subnet_id])
-    return json_to_cel(subnets)
+    return _get_related_cached("subnet", subnet_id)
 
 
 def flow_logs(resource: celtypes.MapType,) -> celtypes.Value:
@@ -949,14 +1283,19 @@ def flow_logs(resource: celtypes.MapType,) -> celtypes.Value:
 
     ..  todo:: Refactor :func:`c7nlib.flow_logs` -- it exposes too much implementation detail.
 
+    The flow logs are described once per :py:class:`C7NContext`, and the mapping
+    from resource ID to flow logs is reused for every resource.
     """
     # TODO: Refactor into a function in ``CELFilter``. Should not be here.
-    client = C7N.filter.manager.session_factory().client("ec2")
-    logs = client.describe_flow_logs().get("FlowLogs", ())
+    resource_map = C7N._flow_logs_map
+    if resource_map is None:
+        client = C7N.client("ec2")
+        logs = client.describe_flow_logs().get("FlowLogs", ())
+        resource_map = {}
+        for fl in logs:
+            resource_map.setdefault(fl["ResourceId"], []).append(fl)
+        C7N._flow_logs_map = resource_map
     m = C7N.filter.manager.get_model()
-    resource_map: Dict[str, List[Dict[str, Any]]] = {}
-    for fl in logs:
-        resource_map.setdefault(fl["ResourceId"], []).append(fl)
     if resource.get(m.id) in resource_map:
         flogs = resource_map[cast(str, resource.get(m.id))]
         return json_to_cel(flogs)
@@ -975,8 +1314,7 @@ def vpc(vpc_id: celtypes.Value,) -> celtypes.Value:
         See :py:class:`VpcFilter` subclass of :py:class:`RelatedResourceFilter`.
     """
     # Assuming the :py:class:`CELFilter` class has this method extracted from the legacy filter.
-    vpc = C7N.filter.get_related([vpc_id])
-    return json_to_cel(vpc)
+    return _get_related_cached("vpc", vpc_id)
 
 
 def subst(jmes_path: celtypes.StringType,) -> celtypes.StringType:
@@ -1017,6 +1355,7 @@ def credentials(resource: celtypes.MapType) -> celtypes.Value:
     return json_to_cel(C7N.filter.get_credential_report(resource))
 
 
+@_cache_on_context
 def kms_alias(vpc_id: celtypes.Value,) -> celtypes.Value:
     """
     Reach into C7N and make a get_matching_aliases() request using the current C7N filter to get
@@ -1043,8 +1382,7 @@ def kms_key(key_id: celtypes.Value,) -> celtypes.Value:
 
         Provide the :py:class:`RelatedResourceFilter` mixin in a :py:class:`CELFilter` class.
     """
-    key = C7N.filter.get_related([key_id])
-    return json_to_cel(key)
+    return _get_related_cached("kms_key", key_id)
 
 
 def resource_schedule(
@@ -1098,7 +1436,19 @@ def resource_schedule(
 
         key("maid_offhours").resource_schedule().off.exists(s,
             now.getDayOfWeek(s.tz) in s.days && now.getHour(s.tz) == s.hour)
+
+    Many resources share a schedule, so within a :py:class:`C7NContext`
+    each distinct tag value is parsed once.
     """
+    if not isinstance(tag_value, Hashable):
+        return _resource_schedule(tag_value)
+    if tag_value not in C7N._schedule_cache:
+        C7N._schedule_cache[tag_value] = _resource_schedule(tag_value)
+    return C7N._schedule_cache[tag_value]
+
+
+def _resource_schedule(tag_value: celtypes.Value) -> celtypes.Value:
+    """Parse a schedule with the current C7N filter's parser and restructure it for CEL."""
     c7n_sched_doc = C7N.filter.parser.parse(tag_value)
     tz = c7n_sched_doc.pop("tz", "et")
     cel_sched_doc = {
@@ -1110,6 +1460,7 @@ def resource_schedule(
     return json_to_cel(cel_sched_doc)
 
 
+@_cache_on_context
 def get_accounts(resource: celtypes.MapType,) -> celtypes.Value:
     """
     Reach into C7N filter and get accounts for a given resource.
@@ -1123,6 +1474,7 @@ def get_accounts(resource: celtypes.MapType,) -> celtypes.Value:
     return json_to_cel(C7N.filter.get_accounts())
 
 
+@_cache_on_context
 def get_vpcs(resource: celtypes.MapType,) -> celtypes.Value:
     """
     Reach into C7N filter and get vpcs for a given resource.
@@ -1136,6 +1488,7 @@ def get_vpcs(resource: celtypes.MapType,) -> celtypes.Value:
     return json_to_cel(C7N.filter.get_vpcs())
 
 
+@_cache_on_context
 def get_vpces(resource: celtypes.MapType,) -> celtypes.Value:
     """
     Reach into C7N filter and get vpces for a given resource.
@@ -1150,6 +1503,7 @@ def get_vpces(resource: celtypes.MapType,) -> celtypes.Value:
     return json_to_cel(C7N.filter.get_vpces())
 
 
+@_cache_on_context
 def get_orgids(resource: celtypes.MapType,) -> celtypes.Value:
     """
     Reach into C7N filter and get orgids for a given resource.
@@ -1163,6 +1517,7 @@ def get_orgids(resource: celtypes.MapType,) -> celtypes.Value:
     return json_to_cel(C7N.filter.get_orgids())
 
 
+@_cache_on_context
 def get_endpoints(resource: celtypes.MapType,) -> celtypes.Value:
     """For sns resources
 
@@ -1174,6 +1529,7 @@ def get_endpoints(resource: celtypes.MapType,) -> celtypes.Value:
     return json_to_cel(C7N.filter.get_endpoints())
 
 
+@_cache_on_context
 def get_protocols(resource: celtypes.MapType,) -> celtypes.Value:
     """For sns resources
 
@@ -1188,11 +1544,12 @@ def get_key_policy(resource: celtypes.MapType,) -> celtypes.Value:
     ..  todo:: Refactor C7N
     """
     key_id = resource.get(
-        celtypes.StringType("TargetKeyId"),
-        resource.get(celtypes.StringType("KeyId")))
-    client = C7N.filter.manager.session_factory().client("kms")
+        _K_TARGET_KEY_ID,
+        resource.get(_K_KEY_ID))
+    client = C7N.client("kms")
     return json_to_cel(
-        client.get_key_policy(
+        C7N.filter.manager.retry(
+            client.get_key_policy,
             KeyId=key_id,
             PolicyName='default')['Policy']
     )
@@ -1216,11 +1573,11 @@ def describe_subscription_filters(resource: celtypes.MapType,) -> celtypes.Value
 
         this should be directly available in CELFilter.
     """
-    client = C7N.filter.manager.session_factory().client("logs")
+    client = C7N.client("logs")
     return json_to_cel(
         C7N.filter.manager.retry(
             client.describe_subscription_filters,
-            logGroupName=resource['logGroupName']
+            logGroupName=resource[_K_LOG_GROUP_NAME]
         ).get('subscriptionFilters', ())
     )
 
@@ -1229,18 +1586,33 @@ def describe_db_snapshot_attributes(resource: celtypes.MapType,) -> celtypes.Val
     """
     For rds-snapshot and ebs-snapshot resources
 
+    Within a :py:class:`C7NContext`, each snapshot's attributes are requested once,
+    no matter how many times an expression asks for them.
+
     ..  todo:: Refactor C7N
 
         this should be directly available in CELFilter.
     """
-    client = C7N.filter.manager.session_factory().client("ec2")
-    return json_to_cel(
-        C7N.filter.manager.retry(
-            client.describe_snapshot_attribute,
-            SnapshotId=resource['SnapshotId'],
-            Attribute='createVolumePermission'
+    snapshot_id = resource[_K_SNAPSHOT_ID]
+    if snapshot_id not in C7N._snapshot_attributes:
+        client = C7N.client("ec2")
+        C7N._snapshot_attributes[snapshot_id] = json_to_cel(
+            C7N.filter.manager.retry(
+                client.describe_snapshot_attribute,
+                SnapshotId=snapshot_id,
+                Attribute='createVolumePermission'
+            )
         )
-    )
+    return C7N._snapshot_attributes[snapshot_id]
+
+
+# The fields of the two ARN formats, and a mapping from the number of fields to their positions.
+_ARN_FIELDS_5 = ("partition", "service", "region", "account-id", "resource-id")
+_ARN_FIELDS_6 = ("partition", "service", "region", "account-id", "resource-type", "resource-id")
+_ARN_FIELDS_BY_LEN = {
+    len(names): {name: position for position, name in enumerate(names)}
+    for names in (_ARN_FIELDS_5, _ARN_FIELDS_6)
+}
 
 
 def arn_split(arn: celtypes.StringType, field: celtypes.StringType) -> celtypes.Value:
@@ -1258,48 +1630,75 @@ def arn_split(arn: celtypes.StringType, field: celtypes.StringType) -> celtypes.
         ``arn:partition:service:region:account-id:resource-type/resource-id``
 
         ``arn:partition:service:region:account-id:resource-type:resource-id``
+
+    The split is bounded, so a resource-id that contains colons is kept intact.
     """
-    field_names = {
-        len(names): names
-        for names in [
-            ("partition", "service", "region", "account-id", "resource-id"),
-            ("partition", "service", "region", "account-id", "resource-type", "resource-id"),
-        ]
-    }
-    prefix, *fields = arn.split(":")
+    prefix, *fields = arn.split(":", 6)
     if prefix != "arn":
         raise ValueError(f"Not an ARN: {arn}")
-    mapping = dict(zip(field_names[len(fields)], fields))
-    return json_to_cel(mapping[field])
+    position = _ARN_FIELDS_BY_LEN[len(fields)][field]
+    return celtypes.StringType(fields[position])
 
 
+@functools.lru_cache(maxsize=None)
+def _io_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    The thread pool shared by all of the functions that make concurrent AWS requests.
+    It's created on first use, so importing this module doesn't start any threads.
+    """
+    return concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(32, (os.cpu_count() or 4) * 4), thread_name_prefix="celpy-c7n-io"
+    )
+
+
+def _pull_both(first: Callable[[], Any], second: Callable[[], Any]) -> Any:
+    """
+    Run two independent pulls and return the union of their results.
+    The pulls run concurrently only when the :py:class:`C7NContext` has ``concurrent_pulls`` set.
+    """
+    if not C7N.concurrent_pulls:
+        return first() | second()
+    first_future = _io_pool().submit(first)
+    second_future = _io_pool().submit(second)
+    return first_future.result() | second_future.result()
+
+
+@_cache_on_context
 def all_images() -> celtypes.Value:
     """
     Depends on :py:meth:`CELFilter._pull_ec2_images` and :py:meth:`CELFilter._pull_asg_images`
 
     See :py:class:`c7n.resources.ami.ImageUnusedFilter`
+
+    When the :py:class:`C7NContext` has ``concurrent_pulls`` set, the two pulls run
+    concurrently; both methods must then be safe to call from separate threads.
     """
     return json_to_cel(
         list(
-            C7N.filter._pull_ec2_images() | C7N.filter._pull_asg_images()
+            _pull_both(C7N.filter._pull_ec2_images, C7N.filter._pull_asg_images)
         )
     )
 
 
+@_cache_on_context
 def all_snapshots() -> celtypes.Value:
     """
     Depends on :py:meth:`CELFilter._pull_asg_snapshots`
     and :py:meth:`CELFilter._pull_ami_snapshots`
 
     See :py:class:`c7n.resources.ebs.SnapshotUnusedFilter`
+
+    When the :py:class:`C7NContext` has ``concurrent_pulls`` set, the two pulls run
+    concurrently; both methods must then be safe to call from separate threads.
     """
     return json_to_cel(
         list(
-            C7N.filter._pull_asg_snapshots() | C7N.filter._pull_ami_snapshots()
+            _pull_both(C7N.filter._pull_asg_snapshots, C7N.filter._pull_ami_snapshots)
         )
     )
 
 
+@_cache_on_context
 def all_launch_configuration_names() -> celtypes.Value:
     """
     Depends on :py:meth:`CELFilter.manager.get_launch_configuration_names`
@@ -1307,12 +1706,14 @@ def all_launch_configuration_names() -> celtypes.Value:
     See :py:class:`c7n.resources.asg.UnusedLaunchConfig`
     """
     asgs = C7N.filter.manager.get_resource_manager('asg').resources()
-    used = set([
+    # A dict is an ordered set; the names are collected in one pass.
+    used = dict.fromkeys(
         a.get('LaunchConfigurationName', a['AutoScalingGroupName'])
-        for a in asgs if not a.get('LaunchTemplate')])
+        for a in asgs if not a.get('LaunchTemplate'))
     return json_to_cel(list(used))
 
 
+@_cache_on_context
 def all_service_roles() -> celtypes.Value:
     """
     Depends on :py:meth:`CELFilter.service_role_usage`
@@ -1322,6 +1723,7 @@ def all_service_roles() -> celtypes.Value:
     return json_to_cel(C7N.filter.service_role_usage())
 
 
+@_cache_on_context
 def all_instance_profiles() -> celtypes.Value:
     """
     Depends on :py:meth:`CELFilter.instance_profile_usage`
@@ -1331,6 +1733,7 @@ def all_instance_profiles() -> celtypes.Value:
     return json_to_cel(C7N.filter.instance_profile_usage())
 
 
+@_cache_on_context
 def all_dbsubenet_groups() -> celtypes.Value:
     """
     Depends on :py:meth:`CELFilter.get_dbsubnet_group_used`
@@ -1338,12 +1741,13 @@ def all_dbsubenet_groups() -> celtypes.Value:
     See :py:class:`c7n.resources.rds.UnusedRDSSubnetGroup`
     """
     rds = C7N.filter.manager.get_resource_manager('rds').resources()
-    used = set([
+    used = dict.fromkeys(
         r.get('DBSubnetGroupName', r['DBInstanceIdentifier'])
-        for r in rds])
+        for r in rds)
     return json_to_cel(list(used))
 
 
+@_cache_on_context
 def all_scan_groups() -> celtypes.Value:
     """
     Depends on :py:meth:`CELFilter.scan_groups`
@@ -1360,12 +1764,26 @@ def get_access_log(resource: celtypes.MapType) -> celtypes.Value:
     See :py:class:`c7n.resources.elb.IsNotLoggingFilter` and
     :py:class:`c7n.resources.elb.IsLoggingFilter`.
     """
-    client = C7N.filter.manager.session_factory().client('elb')
-    results = client.describe_load_balancer_attributes(
-        LoadBalancerName=resource['LoadBalancerName'])
+    client = C7N.client('elb')
+    results = C7N.filter.manager.retry(
+        client.describe_load_balancer_attributes,
+        LoadBalancerName=resource[_K_LB_NAME])
     return json_to_cel(results['LoadBalancerAttributes'])
 
 
+# Load balancer attribute values that aren't integers.
+_LB_ATTR_COERCE: Mapping[str, bool] = MappingProxyType({'true': True, 'false': False})
+
+
+def _lb_attribute_value(v: str) -> Union[int, bool, str]:
+    """Lightweight JSON atomic value convertion to native Python."""
+    if v in _LB_ATTR_COERCE:
+        return _LB_ATTR_COERCE[v]
+    if v.isdigit() or (v[:1] == '-' and v[1:].isdigit()):
+        return int(v)
+    return v
+
+
 def get_load_balancer(resource: celtypes.MapType) -> celtypes.Value:
     """
     Depends on :py:meth:`CELFilter.resources`
@@ -1373,25 +1791,12 @@ def get_load_balancer(resource: celtypes.MapType) -> celtypes.Value:
     See :py:class:`c7n.resources.appelb.IsNotLoggingFilter` and
     :py:class:`c7n.resources.appelb.IsLoggingFilter`.
     """
-    def parse_attribute_value(v: str) -> Union[int, bool, str]:
-        """Lightweight JSON atomic value convertion to native Python."""
-        if v.isdigit():
-            return int(v)
-        elif v == 'true':
-            return True
-        elif v == 'false':
-            return False
-        return v
-
-    client = C7N.filter.manager.session_factory().client('elbv2')
-    results = client.describe_load_balancer_attributes(
-        LoadBalancerArn=resource['LoadBalancerArn'])
-    print(results)
+    client = C7N.client('elbv2')
+    results = C7N.filter.manager.retry(
+        client.describe_load_balancer_attributes,
+        LoadBalancerArn=resource[_K_LB_ARN])
     return json_to_cel(
-        dict(
-            (item["Key"], parse_attribute_value(item["Value"]))
-            for item in results['Attributes']
-        )
+        {item["Key"]: _lb_attribute_value(item["Value"]) for item in results['Attributes']}
     )
 
 
@@ -1402,7 +1807,7 @@ def shield_protection(resource: celtypes.MapType) -> celtypes.Value:
 
     Applies to most resource types.
     """
-    client = C7N.filter.manager.session_factory().client('shield', region_name='us-east-1')
+    client = C7N.client('shield', region='us-east-1')
     protections = C7N.filter.get_type_protections(client, C7N.filter.manager.get_model())
     protected_resources = [p['ResourceArn'] for p in protections]
     return json_to_cel(protected_resources)
@@ -1419,143 +1824,93 @@ def shield_subscription(resource: celtypes.MapType) -> celtypes.Value:
     return json_to_cel(subscriptions)
 
 
+@_cache_on_context
 def web_acls(resource: celtypes.MapType) -> celtypes.Value:
     """
     Depends on :py:meth:`c7n.resources.cloudfront.IsWafEnabled.process` method.
     This needs to be refactored and renamed to avoid collisions with other ``process()`` variants.
+
+    The mapping doesn't depend on the resource; it's built once per :py:class:`C7NContext`.
     """
     wafs = C7N.filter.manager.get_resource_manager('waf').resources()
     waf_name_id_map = {w['Name']: w['WebACLId'] for w in wafs}
     return json_to_cel(waf_name_id_map)
 
 
-DECLARATIONS: Dict[str, Annotation] = {
-    "glob": celtypes.FunctionType,
-    "difference": celtypes.FunctionType,
-    "intersect": celtypes.FunctionType,
-    "normalize": celtypes.FunctionType,
-    "parse_cidr": celtypes.FunctionType,  # Callable[..., CIDR],
-    "size_parse_cidr": celtypes.FunctionType,
-    "unique_size": celtypes.FunctionType,
-    "version": celtypes.FunctionType,  # Callable[..., ComparableVersion],
-    "present": celtypes.FunctionType,
-    "absent": celtypes.FunctionType,
-    "text_from": celtypes.FunctionType,
-    "value_from": celtypes.FunctionType,
-    "jmes_path": celtypes.FunctionType,
-    "jmes_path_map": celtypes.FunctionType,
-    "key": celtypes.FunctionType,
-    "marked_key": celtypes.FunctionType,
-    "image": celtypes.FunctionType,
-    "get_metrics": celtypes.FunctionType,
-    "get_related_ids": celtypes.FunctionType,
-    "security_group": celtypes.FunctionType,
-    "subnet": celtypes.FunctionType,
-    "flow_logs": celtypes.FunctionType,
-    "vpc": celtypes.FunctionType,
-    "subst": celtypes.FunctionType,
-    "credentials": celtypes.FunctionType,
-    "kms_alias": celtypes.FunctionType,
-    "kms_key": celtypes.FunctionType,
-    "resource_schedule": celtypes.FunctionType,
-    "get_accounts": celtypes.FunctionType,
-    "get_related_sgs": celtypes.FunctionType,
-    "get_related_subnets": celtypes.FunctionType,
-    "get_related_nat_gateways": celtypes.FunctionType,
-    "get_related_igws": celtypes.FunctionType,
-    "get_related_security_configs": celtypes.FunctionType,
-    "get_related_vpc": celtypes.FunctionType,
-    "get_related_kms_keys": celtypes.FunctionType,
-    "get_vpcs": celtypes.FunctionType,
-    "get_vpces": celtypes.FunctionType,
-    "get_orgids": celtypes.FunctionType,
-    "get_endpoints": celtypes.FunctionType,
-    "get_protocols": celtypes.FunctionType,
-    "get_key_policy": celtypes.FunctionType,
-    "get_resource_policy": celtypes.FunctionType,
-    "describe_subscription_filters": celtypes.FunctionType,
-    "describe_db_snapshot_attributes": celtypes.FunctionType,
-    "arn_split": celtypes.FunctionType,
-    "all_images": celtypes.FunctionType,
-    "all_snapshots": celtypes.FunctionType,
-    "all_launch_configuration_names": celtypes.FunctionType,
-    "all_service_roles": celtypes.FunctionType,
-    "all_instance_profiles": celtypes.FunctionType,
-    "all_dbsubenet_groups": celtypes.FunctionType,
-    "all_scan_groups": celtypes.FunctionType,
-    "get_access_log": celtypes.FunctionType,
-    "get_load_balancer": celtypes.FunctionType,
-    "shield_protection": celtypes.FunctionType,
-    "shield_subscription": celtypes.FunctionType,
-    "web_acls": celtypes.FunctionType,
-    # "etc.": celtypes.FunctionType,
-}
-
 ExtFunction = Callable[..., celtypes.Value]
 
-FUNCTIONS: Dict[str, ExtFunction] = {
-    f.__name__: cast(ExtFunction, f) for f in [
-        glob,
-        difference,
-        intersect,
-        normalize,
-        parse_cidr,
-        size_parse_cidr,
-        unique_size,
-        version,
-        present,
-        absent,
-        text_from,
-        value_from,
-        jmes_path,
-        jmes_path_map,
-        key,
-        marked_key,
-        image,
-        get_metrics,
-        get_related_ids,
-        security_group,
-        subnet,
-        flow_logs,
-        vpc,
-        subst,
-        credentials,
-        kms_alias,
-        kms_key,
-        resource_schedule,
-        get_accounts,
-        get_related_sgs,
-        get_related_subnets,
-        get_related_nat_gateways,
-        get_related_igws,
-        get_related_security_configs,
-        get_related_vpc,
-        get_related_kms_keys,
-        get_vpcs,
-        get_vpces,
-        get_orgids,
-        get_endpoints,
-        get_protocols,
-        get_key_policy,
-        get_resource_policy,
-        describe_subscription_filters,
-        describe_db_snapshot_attributes,
-        arn_split,
-        all_images,
-        all_snapshots,
-        all_launch_configuration_names,
-        all_service_roles,
-        all_instance_profiles,
-        all_dbsubenet_groups,
-        all_scan_groups,
-        get_access_log,
-        get_load_balancer,
-        shield_protection,
-        shield_subscription,
-        web_acls,
-        # etc.
-    ]
-}
+# The extension functions, listed once. The names are the functions' names.
+_EXT_FUNCS: Tuple[ExtFunction, ...] = (
+    glob,
+    difference,
+    intersect,
+    normalize,
+    parse_cidr,
+    size_parse_cidr,
+    cidr_contains_int,
+    unique_size,
+    unique_size_estimate,
+    version,
+    present,
+    absent,
+    text_from,
+    value_from,
+    jmes_path,
+    jmes_path_map,
+    key,
+    marked_key,
+    image,
+    get_metrics,
+    get_related_ids,
+    security_group,
+    subnet,
+    flow_logs,
+    vpc,
+    subst,
+    credentials,
+    kms_alias,
+    kms_key,
+    resource_schedule,
+    get_accounts,
+    get_related_sgs,
+    get_related_subnets,
+    get_related_nat_gateways,
+    get_related_igws,
+    get_related_security_configs,
+    get_related_vpc,
+    get_related_kms_keys,
+    get_vpcs,
+    get_vpces,
+    get_orgids,
+    get_endpoints,
+    get_protocols,
+    get_key_policy,
+    get_resource_policy,
+    describe_subscription_filters,
+    describe_db_snapshot_attributes,
+    arn_split,
+    all_images,
+    all_snapshots,
+    all_launch_configuration_names,
+    all_service_roles,
+    all_instance_profiles,
+    all_dbsubenet_groups,
+    all_scan_groups,
+    get_access_log,
+    get_load_balancer,
+    shield_protection,
+    shield_subscription,
+    web_acls,
+    # etc.
+)
+
+FUNCTIONS: Mapping[str, ExtFunction] = MappingProxyType(
+    {f.__name__: f for f in _EXT_FUNCS}
+)
+
+DECLARATIONS: Mapping[str, Annotation] = MappingProxyType(
+    dict.fromkeys(FUNCTIONS, celtypes.FunctionType)
+)
 
 
 class C7N_Interpreted_Runner(InterpretedRunner):
@@ -1566,15 +1921,71 @@ class C7N_Interpreted_Runner(InterpretedRunner):
     values that CEL expects. This allows a function in this module to reach outside CEL for
     access to C7N's caches.
 
+    If a :py:class:`C7NContext` for the same filter is already active, it's used, so that
+    its caches are shared by all of the evaluations for a collection of resources.
+
+    The environment's base activation, with all of the C7N declarations, is built when
+    the program is created. Each evaluation only nests the resource's variables on top of it.
+    The base activation is never updated by nested activations, so it can be shared.
+
     ..  todo: Refactor to be a mixin to the Runner class hierarchy.
     """
 
+    def __init__(
+        self,
+        environment: Environment,
+        ast: Expression,
+        functions: Optional[Dict[str, CELFunction]] = None,
+    ) -> None:
+        super().__init__(environment, ast, functions)
+        self.base_activation = environment.activation()
+
+    def new_activation(self, context: Context) -> Activation:
+        return self.base_activation.nested_activation(vars=context)
+
     def evaluate(self, context: Context, filter: Optional[Any] = None) -> celtypes.Value:
         e = Evaluator(
             ast=self.ast,
             activation=self.new_activation(context),
             functions=self.functions,
         )
-        with C7NContext(filter=filter):
-            value = e.evaluate()
-        return value
+        return _evaluate_with_filter(e, filter)
+
+
+def _evaluate_with_filter(evaluator: Evaluator, filter: Optional[Any]) -> celtypes.Value:
+    """
+    Evaluate with a :py:class:`C7NContext` for the given filter.
+    An active context for the same filter is reused, so its caches are shared.
+    When no filter is given, any active context is reused; this is the case for
+    evaluations inside a ``with C7NContext(filter=...)`` block.
+
+    Otherwise, a new context is installed directly, without the ``with`` statement's
+    ``__enter__()`` and ``__exit__()`` calls; this happens once per resource.
+    """
+    global C7N
+    if C7N is not None and (filter is None or C7N.filter is filter):
+        return evaluator.evaluate()
+    previous = C7N
+    C7N = C7NContext(filter=filter)
+    try:
+        return evaluator.evaluate()
+    finally:
+        C7N = previous
+
+
+@functools.lru_cache(maxsize=128)
+def compile_and_bind(
+    cel_source: str,
+    decls_key: FrozenSet[Tuple[str, Annotation]],
+    functions_key: FrozenSet[Tuple[str, CELFunction]],
+) -> Runner:
+    """
+    Compile CEL source and bind it to functions, creating a :py:class:`C7N_Interpreted_Runner`.
+
+    The declarations and functions are provided as frozensets of ``(name, value)`` items
+    so they can be part of the cache key. A policy run that builds many filters with the same
+    expression will parse and compile it once.
+    """
+    env = Environment(annotations=dict(decls_key), runner_class=C7N_Interpreted_Runner)
+    ast = env.compile(cel_source)
+    return env.program(ast, functions=dict(functions_key))
@@ -24,11 +24,18 @@ There are three collections of tests.
     These tests are essential for making sure we have C7N compatibility.
 """
 import datetime
+import functools
+import gzip
+import http.server
 import io
-import zlib
+import json
+import math
+import threading
+import urllib.error
 from types import SimpleNamespace
 from unittest.mock import Mock, call, sentinel
 
+import urllib3
 from pytest import *
 
 import celpy
@@ -53,14 +60,26 @@ def test_glob():
     assert not celpy.c7nlib.glob("c7nlib.py", "*.pyc")
 
 
+def test_glob_compiled_once():
+    celpy.c7nlib._glob_re.cache_clear()
+    assert celpy.c7nlib.glob("c7nlib.py", "*.py")
+    assert not celpy.c7nlib.glob("c7nlib.pyc", "*.py")
+    info = celpy.c7nlib._glob_re.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
 def test_difference():
     assert celpy.c7nlib.difference(["a", "b"], ["b", "c"])
     assert not celpy.c7nlib.difference(["b"], ["b", "c"])
+    assert not celpy.c7nlib.difference([], ["b"])
 
 
 def test_intersect():
     assert celpy.c7nlib.intersect(["a", "b"], ["b", "c"])
     assert not celpy.c7nlib.intersect(["a", "b"], ["c"])
+    assert celpy.c7nlib.intersect(["c"], ["a", "b", "c"])
+    assert not celpy.c7nlib.intersect([], ["a"])
 
 
 def test_normalize():
@@ -72,6 +91,23 @@ def test_unique_size():
     assert celpy.c7nlib.unique_size(["a", "b", "b", "c"]) == 3
 
 
+def test_unique_size_exact(monkeypatch):
+    monkeypatch.setattr(celpy.c7nlib, '_UNIQUE_SIZE_ESTIMATE_THRESHOLD', 4)
+    assert celpy.c7nlib.unique_size(["a", "b", "b", "c", "d"]) == 4
+
+
+def test_unique_size_estimate(monkeypatch):
+    assert celpy.c7nlib.unique_size_estimate(["a", "b", "b", "c"]) == 3
+    if celpy.c7nlib.HyperLogLog is None:
+        skip("datasketch is not installed")
+    monkeypatch.setattr(celpy.c7nlib, '_UNIQUE_SIZE_ESTIMATE_THRESHOLD', 100)
+    items = [celpy.celtypes.IntType(n) for n in range(5000)]
+    items += [celpy.celtypes.StringType(str(n)) for n in range(5000)]
+    estimate = celpy.c7nlib.unique_size_estimate(items * 2)
+    assert isinstance(estimate, celpy.celtypes.IntType)
+    assert abs(estimate - 10000) < 10000 * 0.05
+
+
 def test_parse_cidr():
     assert len(list(celpy.c7nlib.parse_cidr("192.168.100.0/22").hosts())) == 1022
     assert celpy.c7nlib.parse_cidr("192.168.100.0") in celpy.c7nlib.parse_cidr("192.168.100.0/22")
@@ -83,6 +119,30 @@ def test_parse_cidr():
     )
 
 
+def test_parse_cidr_cached():
+    cidr = celpy.celtypes.StringType("10.0.0.0/8")
+    assert celpy.c7nlib.parse_cidr(cidr) is celpy.c7nlib.parse_cidr(cidr)
+    assert celpy.c7nlib.parse_cidr("10.1.2.3") is celpy.c7nlib.parse_cidr("10.1.2.3")
+
+
+def test_parse_cidr_unhashable():
+    not_a_cidr = celpy.json_to_cel(["10.0.0.0/8"])
+    assert celpy.c7nlib.parse_cidr(not_a_cidr) is None
+    assert celpy.c7nlib.parse_cidr(celpy.json_to_cel({"cidr": "10.0.0.0/8"})) is None
+    assert celpy.c7nlib.size_parse_cidr(not_a_cidr) is None
+    assert not celpy.c7nlib.cidr_contains_int(not_a_cidr, "10.1.2.3")
+
+
+def test_cidr_contains_int():
+    assert celpy.c7nlib.cidr_contains_int("192.168.100.0/22", "192.168.103.255")
+    assert not celpy.c7nlib.cidr_contains_int("192.168.100.0/22", "192.168.104.0")
+    assert not celpy.c7nlib.cidr_contains_int("192.168.100.0/22", "localhost")
+    assert not celpy.c7nlib.cidr_contains_int("localhost", "192.168.100.1")
+    network = celpy.c7nlib.parse_cidr("192.168.100.0/22")
+    assert int(celpy.c7nlib.parse_cidr("192.168.100.1")) in network
+    assert not int(celpy.c7nlib.parse_cidr("192.168.99.255")) in network
+
+
 def test_size_parse_cidr():
     assert celpy.c7nlib.size_parse_cidr("192.168.100.0/22") == 22
     assert celpy.c7nlib.size_parse_cidr("localhost") is None
@@ -93,6 +153,7 @@ def test_version():
     assert celpy.c7nlib.version("2.6") < celpy.c7nlib.version("2.7.18")
     assert celpy.c7nlib.version("2.7") == celpy.c7nlib.version("2.7")
     assert not (celpy.c7nlib.version("2.7") == ">=2.6")
+    assert celpy.c7nlib.version("2.7") is celpy.c7nlib.version("2.7")
 
 
 value_from_examples = [
@@ -103,7 +164,7 @@ value_from_examples = [
         )
     ),
     (
-        ".txt", "gzip", zlib.compress(b"data\n"),
+        ".txt", "gzip", gzip.compress(b"data\n"),
         celpy.celtypes.ListType(
             [celpy.celtypes.StringType('data')]
         )
@@ -170,32 +231,133 @@ value_from_examples = [
 @fixture(params=value_from_examples)
 def mock_urllib_request(monkeypatch, request):
     suffix, encoding, raw_bytes, expected = request.param
-    urllib_request = Mock(
-        Request=Mock(return_value=Mock()),
-        urlopen=Mock(return_value=Mock(
-            info=Mock(return_value=Mock(get=Mock(return_value=encoding))),
-            read=Mock(return_value=raw_bytes)
-        ))
+    response = urllib3.HTTPResponse(
+        body=io.BytesIO(raw_bytes),
+        headers={"Content-Encoding": encoding},
+        status=200,
+        preload_content=False,
     )
-    monkeypatch.setattr(celpy.c7nlib.urllib, 'request', urllib_request)
+    http = Mock(request=Mock(return_value=response))
+    monkeypatch.setattr(celpy.c7nlib, '_HTTP', http)
     mock_os = Mock(
         splitext=Mock(
             return_value=("path", suffix)
         )
     )
     monkeypatch.setattr(celpy.c7nlib.os, 'path', mock_os)
-    return urllib_request, expected
+    return http, expected
+
+
+URL = "https://example.com/path"
 
 
 def test_value_from(mock_urllib_request):
-    urllib_request, expected = mock_urllib_request
-    data = celpy.c7nlib.value_from(sentinel.URL)
-    assert urllib_request.Request.mock_calls == [
-        call(sentinel.URL, headers={'Accept-Encoding': 'gzip'})
+    http, expected = mock_urllib_request
+    data = celpy.c7nlib.value_from(URL)
+    assert http.request.mock_calls == [
+        call("GET", URL, preload_content=False)
     ]
     assert expected == data
 
 
+def test_value_from_cached(mock_urllib_request):
+    http, expected = mock_urllib_request
+    with celpy.c7nlib.C7NContext(filter=Mock()):
+        first = celpy.c7nlib.value_from(URL)
+        second = celpy.c7nlib.value_from(URL)
+    assert first is second
+    assert expected == second
+    assert http.request.call_count == 1
+
+
+@fixture
+def http_server(tmp_path):
+    """A local HTTP server for the files in ``tmp_path``."""
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(tmp_path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_text_from_http_server(http_server, tmp_path):
+    (tmp_path / "data.json").write_text('{"row": 1}')
+    assert celpy.c7nlib.value_from(f"{http_server}/data.json") == {"row": 1}
+    with raises(urllib.error.HTTPError):
+        celpy.c7nlib.text_from(f"{http_server}/missing.json")
+
+
+class RecordingProxyHandler(http.server.BaseHTTPRequestHandler):
+    """A stand-in for a proxy server; the response is the requested URL."""
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_text_from_proxy(monkeypatch, http_server, tmp_path):
+    proxy = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RecordingProxyHandler)
+    thread = threading.Thread(target=proxy.serve_forever, daemon=True)
+    thread.start()
+    try:
+        for name in ("http_proxy", "no_proxy", "NO_PROXY"):
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setenv("HTTP_PROXY", f"http://127.0.0.1:{proxy.server_address[1]}")
+        assert celpy.c7nlib.value_from("http://example.invalid/data.json") == {
+            "path": "http://example.invalid/data.json"
+        }
+        # Hosts named by NO_PROXY bypass the proxy.
+        monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+        (tmp_path / "data.json").write_text('{"row": 1}')
+        assert celpy.c7nlib.value_from(f"{http_server}/data.json") == {"row": 1}
+    finally:
+        proxy.shutdown()
+        proxy.server_close()
+
+
+def test_text_from_file(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("a\nb\n")
+    assert celpy.c7nlib.value_from(path.as_uri()) == ["a", "b"]
+
+
+def test_parse_text_lines():
+    assert celpy.c7nlib.parse_text("a\r\nb\n\nc", "txt") == ["a", "b", "", "c"]
+    assert celpy.c7nlib.parse_text('{"row": 1}\n\n{"row": 2}\n', "ndjson") == [
+        {"row": 1}, {"row": 2}
+    ]
+
+
+def test_parse_text_json_like_json_module():
+    """The results don't depend on whether orjson is installed."""
+    doc = celpy.c7nlib.parse_text('{"ratio": NaN}', "json")
+    assert math.isnan(doc["ratio"])
+    with raises(ValueError):
+        celpy.c7nlib.parse_text('{"id": 18446744073709551616}', "json")
+    assert celpy.c7nlib.parse_text('{"id": 42}\n{"ratio": Infinity}', "ndjson") == [
+        {"id": 42}, {"ratio": math.inf}
+    ]
+
+
+def test_parse_text_csv_irregular():
+    """Short rows, blank lines, and repeated headings are read as the csv module reads them."""
+    source = "a,b,c\r\n1,2\r\n\r\n3,4,5\r\n"
+    assert celpy.c7nlib.parse_text(source, "csv") == [
+        ["a", "b", "c"], ["1", "2"], [], ["3", "4", "5"]
+    ]
+    assert celpy.c7nlib.parse_text(source, "csv2dict") == [
+        {"a": "1", "b": "2", "c": None}, {"a": "3", "b": "4", "c": "5"}
+    ]
+    assert celpy.c7nlib.parse_text("a,a\r\n1,2\r\n", "csv2dict") == [{"a": "2"}]
+
+
 def test_value_from_bad_format():
     with raises(ValueError):
         celpy.c7nlib.value_from(sentinel.URL, format="nope")
@@ -238,6 +400,18 @@ def test_jmes_path_map(doclist_path_expected):
     assert expected_list == actual_list
 
 
+def test_jmes_path_compiled_once():
+    celpy.c7nlib._compile_jmes.cache_clear()
+    doclist = celpy.celtypes.ListType(
+        [celpy.adapter.json_to_cel({"foo": n}) for n in range(3)]
+    )
+    celpy.c7nlib.jmes_path_map(doclist, celpy.celtypes.StringType("foo"))
+    celpy.c7nlib.jmes_path(doclist[0], celpy.celtypes.StringType("foo"))
+    info = celpy.c7nlib._compile_jmes.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
 def test_present():
     assert celpy.c7nlib.present(celpy.celtypes.StringType("yes"))
     assert not celpy.c7nlib.present(celpy.celtypes.StringType(""))
@@ -312,6 +486,17 @@ def test_marked_key_wrong_format():
     assert doc is None
 
 
+def test_marked_key_no_message():
+    tags_bad = celpy.json_to_cel(
+        [{"Key": "c7n-tag-compliance", "Value": "stop@2020-09-10"}]
+    )
+    doc = celpy.c7nlib.marked_key(
+        tags_bad,
+        celpy.celtypes.StringType("c7n-tag-compliance")
+    )
+    assert doc is None
+
+
 def test_arn_split():
     f1 = "arn:partition-1:service-1:region-1:account-id-1:resource-id-1"
     assert celpy.c7nlib.arn_split(f1, "partition") == "partition-1"
@@ -335,17 +520,23 @@ def test_arn_split():
     assert celpy.c7nlib.arn_split(f3, "resource-type") == "resource-type-3"
     assert celpy.c7nlib.arn_split(f3, "resource-id") == "resource-id-3"
 
+    f4 = "arn:aws:logs:us-east-1:123456789012:log-group:my-group:*"
+    assert celpy.c7nlib.arn_split(f4, "resource-type") == "log-group"
+    assert celpy.c7nlib.arn_split(f4, "resource-id") == "my-group:*"
+
     with raises(ValueError):
         celpy.c7nlib.arn_split("http://server.name:port/path/to/resource", "partition")
 
 
 @fixture
-def celfilter_instance():
+def celfilter_instance(monkeypatch):
     """
     The mocked CELFilter instance for all of the c7nlib integration tests.
 
     This CELFilter class demonstrates *all* the features required for the refactored C7N.
+    Clients are created without a botocore retry configuration, even if botocore is installed.
     """
+    monkeypatch.setattr(celpy.c7nlib, '_CLIENT_CONFIG', None)
     datapoints = [
         {"Average": str(sentinel.average)}
     ]
@@ -428,7 +619,7 @@ def celfilter_instance():
     }
     mock_session = Mock(
         name="mock_session instance",
-        client=Mock(side_effect=lambda name, region_name=None: clients.get(name))
+        client=Mock(side_effect=lambda name, region_name=None, config=None: clients.get(name))
     )
 
     asg_resource_manager = Mock(
@@ -614,6 +805,16 @@ def test_image_age_missing(celfilter_instance):
     assert doc.get(celpy.celtypes.StringType('CreationDate')) == celpy.celtypes.TimestampType("2000-01-01T01:01:01.000Z")
 
 
+def test_parse_iso_datetime():
+    assert celpy.c7nlib._parse_iso_datetime("2020-09-10T11:12:13.000Z") == datetime.datetime(
+        2020, 9, 10, 11, 12, 13, tzinfo=datetime.timezone.utc
+    )
+    # Not handled by fromisoformat(); falls back to dateutil.
+    assert celpy.c7nlib._parse_iso_datetime("2020-09-10T24:00:00") == datetime.datetime(
+        2020, 9, 11, 0, 0, 0
+    )
+
+
 def test_get_raw_metrics(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     datapoints = celfilter_instance['datapoints']
@@ -725,6 +926,21 @@ def test_security_group(celfilter_instance):
     )
 
 
+def test_security_group_cached(celfilter_instance):
+    mock_sg = dict(
+        SecurityGroupId="sg-12345678",
+        SecurityGroupName="SomeName",
+    )
+    mock_filter = celfilter_instance['the_filter']
+    mock_filter.get_related = Mock(return_value=[mock_sg])
+    sg_id = celpy.celtypes.StringType("sg-12345678")
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        doc_1 = celpy.c7nlib.security_group(sg_id)
+        doc_2 = celpy.c7nlib.security_group(sg_id)
+    assert doc_1 == doc_2 == celpy.adapter.json_to_cel([mock_sg])
+    assert mock_filter.get_related.mock_calls == [call([sg_id])]
+
+
 def test_subnet(celfilter_instance):
     mock_subnet = dict(
         SubnetID="subnet-12345678",
@@ -875,6 +1091,16 @@ def test_C7N_resource_schedule(celfilter_instance):
         ]),
     }
 
+def test_C7N_resource_schedule_cached(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    tag_value = celpy.celtypes.StringType("off=[(M-F,21),(U,18)];on=[(M-F,6),(U,10)];tz=pt")
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        first = celpy.c7nlib.resource_schedule(tag_value)
+        second = celpy.c7nlib.resource_schedule(tag_value)
+    assert first is second
+    assert mock_filter.parser.parse.mock_calls == [call(tag_value)]
+
+
 def test_get_accounts(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     ami_doc = {"ResourceType": "ami"}
@@ -938,6 +1164,7 @@ def test_describe_subscription_filters(celfilter_instance):
         policy = celpy.c7nlib.describe_subscription_filters(log_group_doc)
     assert policy == [str(sentinel.subscription_filter)]
 
+
 def test_describe_db_snapshot_attributes(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     rds_snapshot_doc = {"ResourceType": "rds-snapshot", "SnapshotId": str(sentinel.snapshot_id)}
@@ -946,6 +1173,18 @@ def test_describe_db_snapshot_attributes(celfilter_instance):
     assert policy == [str(sentinel.snashot_permission)]
 
 
+def test_describe_db_snapshot_attributes_cached(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    rds_snapshot_doc = {"ResourceType": "rds-snapshot", "SnapshotId": str(sentinel.snapshot_id)}
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        first = celpy.c7nlib.describe_db_snapshot_attributes(rds_snapshot_doc)
+        second = celpy.c7nlib.describe_db_snapshot_attributes(rds_snapshot_doc)
+    assert first is second
+    assert celfilter_instance['ec2_client'].describe_snapshot_attribute.mock_calls == [
+        call(SnapshotId=str(sentinel.snapshot_id), Attribute='createVolumePermission')
+    ]
+
+
 def test_C7N_interpreted_runner(celfilter_instance):
     """
     This is an integration test to demonstrate the full C7N processing.
@@ -984,6 +1223,95 @@ def test_C7N_interpreted_runner(celfilter_instance):
     assert cel_result
 
 
+def test_C7N_functions_declared():
+    assert list(celpy.c7nlib.DECLARATIONS) == list(celpy.c7nlib.FUNCTIONS)
+    assert "cidr_contains_int" in celpy.c7nlib.FUNCTIONS
+    assert "unique_size_estimate" in celpy.c7nlib.FUNCTIONS
+    with raises(TypeError):
+        celpy.c7nlib.FUNCTIONS["glob"] = None
+
+
+def test_C7N_interpreted_runner_shares_context(celfilter_instance):
+    """
+    An evaluation within an active :py:class:`C7NContext` for the same filter
+    uses that context -- and its caches -- instead of creating a new one.
+    """
+    mock_filter = celfilter_instance['the_filter']
+    cel_env = celpy.Environment(
+        annotations=dict(celpy.c7nlib.DECLARATIONS),
+        runner_class=celpy.c7nlib.C7N_Interpreted_Runner
+    )
+    cel_prgm = cel_env.program(cel_env.compile("1+1==2"), functions=celpy.c7nlib.FUNCTIONS)
+    context = celpy.c7nlib.C7NContext(filter=mock_filter)
+    with context:
+        assert cel_prgm.evaluate({}, filter=mock_filter)
+        assert celpy.c7nlib.C7N is context
+        assert cel_prgm.evaluate({}, filter=Mock())
+        assert celpy.c7nlib.C7N is context
+    assert celpy.c7nlib.C7N is None
+    assert cel_prgm.evaluate({}, filter=mock_filter)
+    assert celpy.c7nlib.C7N is None
+    failing_prgm = cel_env.program(cel_env.compile("1/0 == 1"), functions=celpy.c7nlib.FUNCTIONS)
+    with raises(celpy.CELEvalError):
+        failing_prgm.evaluate({}, filter=mock_filter)
+    assert celpy.c7nlib.C7N is None
+
+
+def test_C7N_interpreted_runner_documented_loop(celfilter_instance):
+    """
+    The module docstring's ``process()`` example evaluates without a ``filter=`` argument
+    inside a ``with C7NContext(...)`` block. The active context is used for every resource.
+    """
+    mock_filter = celfilter_instance['the_filter']
+    decls = {"resource": celpy.celtypes.MapType}
+    decls.update(celpy.c7nlib.DECLARATIONS)
+    cel_env = celpy.Environment(
+        annotations=decls,
+        runner_class=celpy.c7nlib.C7N_Interpreted_Runner
+    )
+    cel_prgm = cel_env.program(
+        cel_env.compile("size(get_accounts(resource)) == 1"), functions=celpy.c7nlib.FUNCTIONS)
+    resources = [{"ResourceType": "ami"}, {"ResourceType": "ami"}]
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        results = [
+            cel_prgm.evaluate({"resource": celpy.json_to_cel(resource)})
+            for resource in resources
+        ]
+    assert results == [celpy.celtypes.BoolType(True), celpy.celtypes.BoolType(True)]
+    assert mock_filter.get_accounts.mock_calls == [call()]
+
+
+def test_C7N_interpreted_runner_base_activation(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    decls = {"resource": celpy.celtypes.MapType}
+    decls.update(celpy.c7nlib.DECLARATIONS)
+    cel_env = celpy.Environment(annotations=decls, runner_class=celpy.c7nlib.C7N_Interpreted_Runner)
+    cel_prgm = cel_env.program(
+        cel_env.compile('resource["Tags"].key("Name") == "x"'), functions=celpy.c7nlib.FUNCTIONS
+    )
+    base_activation = cel_prgm.base_activation
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        for name, expected in [("x", True), ("y", False)]:
+            cel_activation = {
+                "resource": celpy.json_to_cel({"Tags": [{"Key": "Name", "Value": name}]})
+            }
+            assert cel_prgm.evaluate(cel_activation, filter=mock_filter) == expected
+    assert cel_prgm.base_activation is base_activation
+    assert base_activation.identifiers["resource"].value is celpy.celtypes.MapType
+
+
+def test_C7N_compile_and_bind(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    decls_key = frozenset(celpy.c7nlib.DECLARATIONS.items())
+    functions_key = frozenset(celpy.c7nlib.FUNCTIONS.items())
+    cel_prgm = celpy.c7nlib.compile_and_bind("normalize(' A ') == 'a'", decls_key, functions_key)
+    assert isinstance(cel_prgm, celpy.c7nlib.C7N_Interpreted_Runner)
+    assert cel_prgm.evaluate({}, filter=mock_filter)
+    assert celpy.c7nlib.compile_and_bind(
+        "normalize(' A ') == 'a'", decls_key, functions_key
+    ) is cel_prgm
+
+
 def test_C7N_CELFilter_image(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     ec2_doc = {"ResourceType": "ec2"}
@@ -1023,6 +1351,31 @@ def test_C7N_CELFilter_get_raw_metrics(celfilter_instance):
     assert cloudwatch_client.mock_calls == [call.get_metric_statistics(**expected_request)]
 
 
+def test_C7N_CELFilter_client_cached(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        cloudwatch = [celpy.c7nlib.C7N.client("cloudwatch") for _ in range(2)]
+        health = [celpy.c7nlib.C7N.client("health", region="us-east-1") for _ in range(2)]
+    assert cloudwatch == [celfilter_instance['cloudwatch_client']] * 2
+    assert health == [celfilter_instance['health_client']] * 2
+    assert mock_filter.manager.session_factory.return_value.client.mock_calls == [
+        call("cloudwatch"),
+        call("health", region_name="us-east-1"),
+    ]
+
+
+def test_C7N_CELFilter_client_config(celfilter_instance, monkeypatch):
+    mock_filter = celfilter_instance['the_filter']
+    monkeypatch.setattr(celpy.c7nlib, '_CLIENT_CONFIG', sentinel.config)
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        celpy.c7nlib.C7N.client("cloudwatch")
+        celpy.c7nlib.C7N.client("health", region="us-east-1")
+    assert mock_filter.manager.session_factory.return_value.client.mock_calls == [
+        call("cloudwatch", config=sentinel.config),
+        call("health", region_name="us-east-1", config=sentinel.config),
+    ]
+
+
 def test_C7N_CELFilter_get_metrics(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     ec2_doc = {"ResourceType": "ec2", "InstanceId": "i-123456789"}
@@ -1053,6 +1406,30 @@ def test_C7N_CELFilter_get_metrics(celfilter_instance):
     assert cloudwatch_client.mock_calls == [call.get_metric_statistics(**expected_request)]
 
 
+def test_C7N_CELFilter_filter_results_cached(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        first = celpy.c7nlib.get_accounts({"ResourceType": "ec2"})
+        second = celpy.c7nlib.get_accounts({"ResourceType": "sns"})
+        images = celpy.c7nlib.all_images()
+        assert celpy.c7nlib.all_images() is images
+    assert first is second
+    assert mock_filter.get_accounts.mock_calls == [call()]
+    assert mock_filter._pull_ec2_images.mock_calls == [call()]
+
+
+def test_C7N_CELFilter_caches_reset_on_exit(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    tag_value = celpy.celtypes.StringType("off=(M-F,21);tz=pt")
+    context = celpy.c7nlib.C7NContext(filter=mock_filter)
+    for _ in range(2):
+        with context:
+            celpy.c7nlib.get_accounts({"ResourceType": "ec2"})
+            celpy.c7nlib.resource_schedule(tag_value)
+    assert mock_filter.get_accounts.mock_calls == [call(), call()]
+    assert mock_filter.parser.parse.mock_calls == [call(tag_value), call(tag_value)]
+
+
 def test_C7N_CELFilter_get_related_ids(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     ec2_doc = {"ResourceType": "ec2", "InstanceId": "i-123456789"}
@@ -1152,6 +1529,19 @@ def test_C7N_CELFilter_flow_logs(celfilter_instance):
     ec2_client = celfilter_instance['ec2_client']
     assert ec2_client.describe_flow_logs.mock_calls == [call()]
 
+
+def test_C7N_CELFilter_flow_logs_described_once(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    ec2_docs = [
+        {"ResourceType": "ec2", "InstanceId": "i-123456789"},
+        {"ResourceType": "ec2", "InstanceId": "i-111111111"},
+    ]
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        flow_logs = [celpy.c7nlib.flow_logs(ec2_doc) for ec2_doc in ec2_docs]
+    assert flow_logs == [[{"ResourceId": "i-123456789"}], []]
+    ec2_client = celfilter_instance['ec2_client']
+    assert ec2_client.describe_flow_logs.mock_calls == [call()]
+
 def test_C7N_CELFilter_vpc(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     ec2_doc = {"ResourceType": "ec2", "InstanceId": "i-123456789"}
@@ -1226,6 +1616,27 @@ def test_C7N_CELFilter_all_snapshots(celfilter_instance):
     assert mock_filter._pull_ami_snapshots.mock_calls == [call()]
 
 
+def test_io_pool_shared():
+    assert celpy.c7nlib._io_pool() is celpy.c7nlib._io_pool()
+
+
+def test_C7N_CELFilter_all_images_concurrent_pulls(celfilter_instance):
+    mock_filter = celfilter_instance['the_filter']
+    threads = []
+    mock_filter._pull_ec2_images.side_effect = lambda: (
+        threads.append(threading.current_thread()) or {str(sentinel.ec2_image_id)}
+    )
+    with celpy.c7nlib.C7NContext(filter=mock_filter):
+        celpy.c7nlib.all_images()
+    with celpy.c7nlib.C7NContext(filter=mock_filter, concurrent_pulls=True):
+        images = celpy.c7nlib.all_images()
+    assert images == celpy.celtypes.ListType(
+        [celpy.celtypes.StringType(str(sentinel.ec2_image_id))]
+    )
+    assert threads[0] is threading.main_thread()
+    assert threads[1] is not threading.main_thread()
+
+
 def test_C7N_CELFilter_all_launch_configuration_names(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     asg_doc = {"ResourceType": "asg", "InstanceId": "i-123456789"}
@@ -1319,6 +1730,16 @@ def test_C7N_CELFilter_get_load_balancer(celfilter_instance):
     ]
 
 
+def test_lb_attribute_value():
+    assert celpy.c7nlib._lb_attribute_value("true") is True
+    assert celpy.c7nlib._lb_attribute_value("false") is False
+    assert celpy.c7nlib._lb_attribute_value("60") == 60
+    assert celpy.c7nlib._lb_attribute_value("-1") == -1
+    assert celpy.c7nlib._lb_attribute_value("-") == "-"
+    assert celpy.c7nlib._lb_attribute_value("--1") == "--1"
+    assert celpy.c7nlib._lb_attribute_value("other") == "other"
+
+
 def test_C7N_CELFilter_get_raw_health_events(celfilter_instance):
     mock_filter = celfilter_instance['the_filter']
     health_events = celfilter_instance['health_events']
@@ -1394,6 +1815,7 @@ def test_C7N_CELFilter_web_acls(celfilter_instance):
     distribution_doc = {"ResourceType": "distribution", "arn": "arn:us-east-1:app-elb:123456789:etc"}
     with celpy.c7nlib.C7NContext(filter=mock_filter):
         web_acls = celpy.c7nlib.web_acls(distribution_doc)
+        assert celpy.c7nlib.web_acls(distribution_doc) is web_acls
     assert web_acls == celpy.json_to_cel(
         {str(sentinel.waf_name): str(sentinel.waf_acl_id)}
     )